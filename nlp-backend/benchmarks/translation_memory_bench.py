@@ -0,0 +1,98 @@
+"""Report translation-memory hit rate and latency for repeated course material.
+
+Upstream calls are simulated with a fixed delay so the numbers isolate what the
+memory saves. Run from nlp-backend/:  python -m benchmarks.translation_memory_bench
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import tempfile
+import time
+
+from services.translation_memory import TranslationMemory, translate_with_memory
+
+LESSON_SENTENCES = [
+    "The present perfect connects the past with the present.",
+    "She has lived in London for ten years.",
+    "We use the past simple for finished actions.",
+    "He went to the market yesterday.",
+    "Have you ever visited Paris?",
+    "The future continuous describes actions in progress at a future time.",
+    "By next week, they will have finished the project.",
+    "I was reading when the phone rang.",
+    "If it rains, we will stay at home.",
+    "Neither of the answers is correct.",
+]
+
+
+def bounded_int(low: int, high: int = None):
+    def integer(value: str) -> int:
+        number = int(value)
+        if number < low or (high is not None and number > high):
+            limit = f"between {low} and {high}" if high is not None else f"at least {low}"
+            raise argparse.ArgumentTypeError(f"must be {limit}, got {number}")
+        return number
+    return integer
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty, sorted list."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def build_lessons(count: int, sentences_per_lesson: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(LESSON_SENTENCES, sentences_per_lesson)) for _ in range(count)]
+
+
+async def run(args) -> None:
+    upstream_calls = 0
+
+    async def fake_translate_batch(segments: list) -> list:
+        nonlocal upstream_calls
+        upstream_calls += 1
+        await asyncio.sleep(args.upstream_latency)
+        return [f"[{args.target}] {segment}" for segment in segments]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = TranslationMemory(os.path.join(tmp, "tm.db"))
+        lessons = build_lessons(args.lessons, args.sentences, args.seed)
+
+        latencies = []
+        hits = misses = failed = 0
+        for text in lessons:
+            start = time.perf_counter()
+            result = await translate_with_memory(memory, text, "English", args.target, fake_translate_batch)
+            latencies.append(time.perf_counter() - start)
+            hits += result["tm_hits"]
+            misses += result["tm_misses"]
+            failed += result["failed"]
+        memory.close()
+
+    first_request = latencies[0]
+    latencies.sort()
+    total = hits + misses + failed
+    print(f"lessons: {len(lessons)}  segments: {total}  upstream calls: {upstream_calls}")
+    print(f"TM hit rate: {hits / total:.1%} ({hits} hits, {misses} misses, {failed} failed)")
+    print(f"first request (cold): {1000 * first_request:.2f} ms")
+    print(f"median latency: {1000 * percentile(latencies, 0.5):.2f} ms")
+    print(f"p95 latency: {1000 * percentile(latencies, 0.95):.2f} ms")
+    print(f"max latency: {1000 * latencies[-1]:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lessons", type=bounded_int(1), default=200)
+    parser.add_argument("--sentences", type=bounded_int(1, len(LESSON_SENTENCES)), default=5)
+    parser.add_argument("--target", default="Spanish")
+    parser.add_argument("--upstream-latency", type=float, default=0.5,
+                        help="simulated seconds per upstream batch call")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, File, UploadFile, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, Request, Header
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from io import BytesIO
@@ -9,6 +9,8 @@ import os
 import random
 from dotenv import load_dotenv
 from services.grammar_checker import analyze_sentence_with_groq
+from services.translator import translate_text
+from services import profiler
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -24,6 +26,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling, see services/profiler.py
+app.add_middleware(profiler.ProfilingMiddleware)
+
 # === SCHEMAS ===
 class SentenceRequest(BaseModel):
     sentence: str
@@ -36,6 +41,26 @@ class SentenceResponse(BaseModel):
 class ChatRequest(BaseModel):
     message: str
 
+class TranslateRequest(BaseModel):
+    text: str
+    source_lang: str = "English"
+    target_lang: str
+
+class TranslatedSegment(BaseModel):
+    source: str
+    translation: str
+    translated: bool
+    from_memory: bool
+    fuzzy_score: float | None
+
+class TranslateResponse(BaseModel):
+    translation: str
+    segments: list[TranslatedSegment]
+    tm_hits: int
+    tm_misses: int
+    failed: int
+    tm_hit_rate: float
+
 class GrammarWord(BaseModel):
     term: str
     definition: str
@@ -95,6 +120,15 @@ User: {request.message}
     except Exception as e:
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
+# ✅ Bilingual translation backed by the translation memory
+@app.post("/translate", response_model=TranslateResponse)
+async def translate(request: TranslateRequest):
+    try:
+        result = await translate_text(request.text, request.source_lang, request.target_lang)
+        return TranslateResponse(**result)
+    except Exception as e:
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
 # ✅ Document Upload for Correction
 @app.post("/upload-document")
 async def upload_document(file: UploadFile = File(...)):
@@ -157,6 +191,42 @@ async def correct_with_groq(text: str) -> str:
         else:
             return f"[Error] Groq API: {data.get('error', {}).get('message', 'Unexpected response')}"
 
+# ✅ Admin: captured request profiles
+def _check_admin_token(token):
+    if not profiler.check_admin_token(token):
+        return JSONResponse(content={"error": "Forbidden"}, status_code=403)
+    return None
+
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: str | None = Header(default=None)):
+    denied = _check_admin_token(x_admin_token)
+    if denied:
+        return denied
+    return {"profiles": profiler.list_profiles()}
+
+@app.get("/admin/profiles/{profile_id}")
+def download_profile(profile_id: int, format: str = "speedscope", x_admin_token: str | None = Header(default=None)):
+    denied = _check_admin_token(x_admin_token)
+    if denied:
+        return denied
+
+    profile = profiler.get_profile(profile_id)
+    if profile is None:
+        return JSONResponse(content={"error": "Profile not found."}, status_code=404)
+
+    if format == "collapsed":
+        return PlainTextResponse(
+            profiler.to_collapsed(profile),
+            headers={'Content-Disposition': f'attachment; filename="profile-{profile_id}.folded"'}
+        )
+    elif format == "speedscope":
+        return JSONResponse(
+            content=profiler.to_speedscope(profile),
+            headers={'Content-Disposition': f'attachment; filename="profile-{profile_id}.speedscope.json"'}
+        )
+
+    return JSONResponse(content={"error": "Unsupported format. Use speedscope or collapsed."}, status_code=400)
+
 # ✅ Daily Grammar Words Generator
 word_pool = [
 
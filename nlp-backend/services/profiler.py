@@ -0,0 +1,204 @@
+import asyncio
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+PROFILE_HEADER = b"x-profile"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+
+profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+_profile_ids = itertools.count(1)
+
+
+def check_admin_token(token) -> bool:
+    """Constant-time comparison against PROFILING_ADMIN_TOKEN; always False if it is unset."""
+    if not PROFILING_ADMIN_TOKEN or token is None:
+        return False
+    if isinstance(token, str):
+        token = token.encode()
+    return hmac.compare_digest(token, PROFILING_ADMIN_TOKEN.encode())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _await_chain(coro, anchor) -> list:
+    """Walk a suspended coroutine's await chain, keeping frames from anchor down."""
+    stack = []
+    seen_anchor = False
+    obj = coro
+    while obj is not None:
+        frame = getattr(obj, "cr_frame", None) or getattr(obj, "gi_frame", None) or getattr(obj, "ag_frame", None)
+        if frame is None:
+            break
+        seen_anchor = seen_anchor or frame is anchor
+        if seen_anchor:
+            stack.append(_frame_label(frame))
+        obj = getattr(obj, "cr_await", None) or getattr(obj, "gi_yieldfrom", None) or getattr(obj, "ag_await", None)
+    # Without the anchor the sample isn't tied to this request, so drop it.
+    if not seen_anchor:
+        return []
+    if obj is not None:
+        stack.append(f"<await {type(obj).__name__}>")
+    return stack
+
+
+class RequestProfiler:
+    """Samples one request's wall-clock stack from a background thread.
+
+    While the request's task is running, the event loop thread's stack is
+    recorded. While it is suspended (e.g. waiting on Groq), the task's await
+    chain is recorded instead, so time spent awaiting is attributed to the
+    awaiting code rather than to the event loop.
+    """
+
+    def __init__(self, anchor, interval: float = PROFILE_INTERVAL):
+        self.anchor = anchor
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.task = asyncio.current_task()
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._last = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            stack = self._sample()
+            if stack:
+                self.samples[tuple(stack)] += int((now - self._last) * 1_000_000)
+            self._last = now
+
+    def _sample(self) -> list:
+        frame = sys._current_frames().get(self.thread_id)
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            if frame is self.anchor:
+                # The middleware's own bookkeeping (start/stop/join) isn't request time.
+                if len(frames) < 2 or frames[-2].f_code.co_filename == __file__:
+                    return []
+                return [_frame_label(f) for f in reversed(frames)]
+            frame = frame.f_back
+        if self.task is None or self.task.done():
+            return []
+        return _await_chain(self.task.get_coro(), self.anchor)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests whose X-Profile header carries the admin token,
+    a PROFILE_SAMPLE_RATE fraction of requests (kept only if slower than
+    PROFILE_SLOW_MS), and nothing at all unless PROFILING_ENABLED=1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILING_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = next((value for name, value in scope["headers"] if name == PROFILE_HEADER), None)
+        forced = check_admin_token(header)
+        if not forced and (PROFILE_SAMPLE_RATE <= 0 or random.random() >= PROFILE_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = next(_profile_ids)
+
+        async def send_with_id(message):
+            if forced and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", str(profile_id).encode())]
+            await send(message)
+
+        profiler = RequestProfiler(sys._getframe())
+        started = time.time()
+        start = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            profiler.stop()
+            if forced or duration_ms >= PROFILE_SLOW_MS:
+                profiles.append({
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "started": started,
+                    "duration_ms": round(duration_ms, 2),
+                    "trigger": "header" if forced else "threshold",
+                    "samples": profiler.samples,
+                })
+
+
+# The admin endpoints read the buffer from a worker thread while the middleware
+# appends on the event loop, so iterate over a list() snapshot, never the deque.
+def list_profiles() -> list:
+    return [
+        {key: value for key, value in profile.items() if key != "samples"}
+        for profile in reversed(list(profiles))
+    ]
+
+
+def get_profile(profile_id: int):
+    for profile in list(profiles):
+        if profile["id"] == profile_id:
+            return profile
+    return None
+
+
+def to_collapsed(profile: dict) -> str:
+    """Brendan Gregg's collapsed-stack format, readable by flamegraph.pl and speedscope."""
+    return "\n".join(
+        f"{';'.join(stack)} {weight}" for stack, weight in profile["samples"].items() if weight > 0
+    ) + "\n"
+
+
+def to_speedscope(profile: dict) -> dict:
+    frame_index = {}
+    samples = []
+    weights = []
+    for stack, weight in profile["samples"].items():
+        samples.append([frame_index.setdefault(label, len(frame_index)) for label in stack])
+        weights.append(weight)
+
+    name = f"{profile['method']} {profile['path']} #{profile['id']}"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": [{"name": label} for label in frame_index]},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "microseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "grammar-assistant",
+    }
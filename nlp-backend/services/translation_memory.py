@@ -0,0 +1,231 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+from difflib import SequenceMatcher
+
+TM_DB_PATH = os.getenv("TM_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "translation_memory.db"))
+FUZZY_MIN_SCORE = 0.75
+FUZZY_MAX_CANDIDATES = 200
+# Misses beyond this many per request are not fuzzy-scored.
+FUZZY_MAX_SEGMENTS = 50
+
+# A sentence ends at ., !, ? (optionally followed by closing quotes/brackets) then whitespace.
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+# Words that end in "." without ending the sentence.
+_ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "vs", "no", "fig",
+    "e.g", "i.e", "cf", "approx", "jan", "feb", "mar", "apr", "jun", "jul",
+    "aug", "sep", "sept", "oct", "nov", "dec",
+}
+
+
+def _is_sentence_end(text: str, start: int, match) -> bool:
+    if text[match.start() - 1] != ".":
+        return True
+    # "approx. five" - a lowercase continuation is the same sentence.
+    following = text[match.end():match.end() + 1]
+    if following.islower():
+        return False
+    words = text[start:match.start() - 1].split()
+    word = words[-1].lstrip("\"'([").lower() if words else ""
+    # Initials ("J. Smith") and known abbreviations ("Mr. Smith").
+    return not ((len(word) == 1 and word.isalpha()) or word in _ABBREVIATIONS)
+
+
+def segment_text(text: str) -> list:
+    """Split text into (segment, trailing_whitespace) pairs so it can be reassembled exactly.
+
+    Leading whitespace comes back as an empty first segment so that it
+    survives translation.
+    """
+    parts = []
+    stripped = text.lstrip()
+    if len(stripped) != len(text):
+        parts.append(("", text[:len(text) - len(stripped)]))
+    pos = len(text) - len(stripped)
+    for match in _SENTENCE_END.finditer(text, pos):
+        if not _is_sentence_end(text, pos, match):
+            continue
+        boundary = match.start() + len(match.group(0).rstrip())
+        parts.append((text[pos:boundary], text[boundary:match.end()]))
+        pos = match.end()
+    if pos < len(text):
+        tail = text[pos:]
+        stripped = tail.rstrip()
+        parts.append((stripped, tail[len(stripped):]))
+    return parts
+
+
+def normalize_segment(segment: str) -> str:
+    return " ".join(segment.split())
+
+
+def normalize_lang(lang: str) -> str:
+    """So that "Spanish", " spanish" and "SPANISH" share one memory."""
+    return " ".join(lang.split()).lower()
+
+
+class TranslationMemory:
+    def __init__(self, path: str = TM_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " source_lang TEXT NOT NULL,"
+            " target_lang TEXT NOT NULL,"
+            " source TEXT NOT NULL,"
+            " target TEXT NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (source_lang, target_lang, source))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS segments_pair_length"
+            " ON segments (source_lang, target_lang, length)"
+        )
+        self._conn.commit()
+
+    def lookup(self, source_lang: str, target_lang: str, segments: list) -> dict:
+        """Return {normalized segment: translation} for every exact hit."""
+        source_lang, target_lang = normalize_lang(source_lang), normalize_lang(target_lang)
+        keys = list({normalize_segment(s) for s in segments if s.strip()})
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT source, target FROM segments"
+                    f" WHERE source_lang = ? AND target_lang = ? AND source IN ({placeholders})",
+                    [source_lang, target_lang, *chunk],
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE segments SET hits = hits + 1"
+                    " WHERE source_lang = ? AND target_lang = ? AND source = ?",
+                    [(source_lang, target_lang, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def fuzzy_lookup(self, source_lang: str, target_lang: str, segment: str):
+        """Return the closest stored (source, target, score), or None below FUZZY_MIN_SCORE."""
+        source_lang, target_lang = normalize_lang(source_lang), normalize_lang(target_lang)
+        key = normalize_segment(segment)
+        if not key:
+            return None
+        # Only segments of similar length can reach the minimum ratio.
+        low = int(len(key) * FUZZY_MIN_SCORE)
+        high = int(len(key) / FUZZY_MIN_SCORE) + 1
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, target FROM segments"
+                " WHERE source_lang = ? AND target_lang = ? AND length BETWEEN ? AND ?"
+                " ORDER BY hits DESC LIMIT ?",
+                (source_lang, target_lang, low, high, FUZZY_MAX_CANDIDATES),
+            ).fetchall()
+
+        best = None
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(key)
+        for source, target in rows:
+            matcher.set_seq1(source)
+            if matcher.real_quick_ratio() < FUZZY_MIN_SCORE or matcher.quick_ratio() < FUZZY_MIN_SCORE:
+                continue
+            score = matcher.ratio()
+            if score >= FUZZY_MIN_SCORE and (best is None or score > best[2]):
+                best = (source, target, round(score, 3))
+        return best
+
+    def fuzzy_scores(self, source_lang: str, target_lang: str, segments: list) -> dict:
+        """Return {segment: best fuzzy score or None}, scoring at most FUZZY_MAX_SEGMENTS."""
+        scores = {}
+        for i, segment in enumerate(segments):
+            fuzzy = self.fuzzy_lookup(source_lang, target_lang, segment) if i < FUZZY_MAX_SEGMENTS else None
+            scores[segment] = fuzzy[2] if fuzzy else None
+        return scores
+
+    def store(self, source_lang: str, target_lang: str, pairs: list) -> None:
+        source_lang, target_lang = normalize_lang(source_lang), normalize_lang(target_lang)
+        rows = [
+            (source_lang, target_lang, normalize_segment(source), target, len(normalize_segment(source)))
+            for source, target in pairs
+            if source.strip()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO segments (source_lang, target_lang, source, target, length)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (source_lang, target_lang, source) DO UPDATE SET target = excluded.target",
+                rows,
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+async def translate_with_memory(memory: TranslationMemory, text: str, source_lang: str,
+                                target_lang: str, translate_batch, batch_size: int = 20) -> dict:
+    """Translate text segment by segment, sending only TM misses to translate_batch.
+
+    translate_batch is an async callable taking a list of segments and returning
+    their translations in the same order, with None for any it could not
+    translate. Those segments are returned as their source text with
+    translated=False, counted under "failed", and never stored.
+    """
+    parts = segment_text(text)
+    segments = [segment for segment, _ in parts]
+    # SQLite and difflib work is blocking, so keep it off the event loop.
+    known = await asyncio.to_thread(memory.lookup, source_lang, target_lang, segments)
+
+    misses = []
+    for segment in segments:
+        key = normalize_segment(segment)
+        if key and key not in known and key not in misses:
+            misses.append(key)
+
+    # Score misses against the memory before their own translations are stored.
+    fuzzy_scores = await asyncio.to_thread(memory.fuzzy_scores, source_lang, target_lang, misses)
+
+    for start in range(0, len(misses), batch_size):
+        batch = misses[start:start + batch_size]
+        translations = await translate_batch(batch)
+        translated = [(source, target) for source, target in zip(batch, translations) if target]
+        await asyncio.to_thread(memory.store, source_lang, target_lang, translated)
+        known.update(translated)
+
+    result_segments = []
+    output = []
+    for segment, whitespace in parts:
+        key = normalize_segment(segment)
+        translated = known.get(key) if key else segment
+        output.append((translated or segment) + whitespace)
+        if key:
+            result_segments.append({
+                "source": segment,
+                "translation": translated or segment,
+                "translated": translated is not None,
+                "from_memory": key not in fuzzy_scores,
+                "fuzzy_score": fuzzy_scores.get(key, 1.0),
+            })
+
+    total = len(result_segments)
+    hits = len([entry for entry in result_segments if entry["from_memory"]])
+    failed = len([entry for entry in result_segments if not entry["translated"]])
+    return {
+        "translation": "".join(output),
+        "segments": result_segments,
+        "tm_hits": hits,
+        "tm_misses": total - hits - failed,
+        "failed": failed,
+        "tm_hit_rate": round(hits / total, 3) if total else 0.0,
+    }
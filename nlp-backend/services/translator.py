@@ -0,0 +1,106 @@
+import asyncio
+import os
+import re
+import httpx
+from dotenv import load_dotenv
+from services.translation_memory import TranslationMemory, translate_with_memory
+
+load_dotenv()
+
+client = httpx.AsyncClient(timeout=30.0)
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = "llama3-70b-8192"
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+memory = TranslationMemory()
+
+# Upper bound on concurrent per-segment retries within one batch.
+RETRY_CONCURRENCY = 4
+
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)[.)]\s*(.*)$")
+
+
+async def _translate_single(segment: str, source_lang: str, target_lang: str):
+    try:
+        translations = await _request_translations([segment], source_lang, target_lang)
+    except (httpx.HTTPError, KeyError, IndexError, ValueError):
+        # A failed retry leaves just this segment untranslated.
+        return None
+    return translations.get(1)
+
+
+async def _request_translations(segments: list, source_lang: str, target_lang: str) -> dict:
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    numbered = "\n".join(f"{i}. {segment}" for i, segment in enumerate(segments, start=1))
+
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": (
+                    f"You are a professional translator. Translate each numbered sentence "
+                    f"from {source_lang} to {target_lang}. Reply with exactly one numbered line "
+                    f"per sentence, in the same order and with the same numbers, and nothing else."
+                ),
+            },
+            {"role": "user", "content": numbered},
+        ],
+        "temperature": 0.2,
+    }
+
+    response = await client.post(GROQ_API_URL, headers=headers, json=payload)
+    response.raise_for_status()
+    data = response.json()
+
+    assistant_message = data["choices"][0]["message"]["content"]
+
+    lines = [line.strip() for line in assistant_message.splitlines() if line.strip()]
+
+    # A one-sentence prompt often comes back without its "1." prefix.
+    if len(segments) == 1 and len(lines) == 1 and not _NUMBERED_LINE.match(lines[0]):
+        return {1: lines[0]}
+
+    # Only trust a reply that lines up one-to-one with the input. If the model
+    # merged or split sentences, translations would be stored under the wrong
+    # source, so return nothing and let the caller fall back per segment.
+    if len(lines) != len(segments):
+        return {}
+    translations = {}
+    for line in lines:
+        match = _NUMBERED_LINE.match(line)
+        if not match or not match.group(2).strip():
+            return {}
+        translations[int(match.group(1))] = match.group(2).strip()
+    if sorted(translations) != list(range(1, len(segments) + 1)):
+        return {}
+    return translations
+
+
+async def translate_batch_with_groq(segments: list, source_lang: str, target_lang: str) -> list:
+    """Return translations in segment order, with None for any that could not be parsed."""
+    translations = await _request_translations(segments, source_lang, target_lang)
+
+    # Retry anything the batched reply dropped, one call per segment, a few at a time.
+    missing = [i for i in range(1, len(segments) + 1) if not translations.get(i)]
+    semaphore = asyncio.Semaphore(RETRY_CONCURRENCY)
+
+    async def retry(segment: str):
+        async with semaphore:
+            return await _translate_single(segment, source_lang, target_lang)
+
+    retried = await asyncio.gather(*(retry(segments[i - 1]) for i in missing))
+    translations.update(zip(missing, retried))
+
+    return [translations.get(i) for i in range(1, len(segments) + 1)]
+
+
+async def translate_text(text: str, source_lang: str, target_lang: str) -> dict:
+    async def translate_batch(segments: list) -> list:
+        return await translate_batch_with_groq(segments, source_lang, target_lang)
+
+    return await translate_with_memory(memory, text, source_lang, target_lang, translate_batch)